@@ -27,3 +27,14 @@ from .presets import (
     ShortTripleSine,
     synths,
 )
+
+from .mixer import Mixer, PeakNormalizer, Track
+
+from .realtime import (
+    BlockStats,
+    NoteOff,
+    NoteOn,
+    RawSink,
+    RealtimeEngine,
+    WavSink,
+)
@@ -1,13 +1,11 @@
-import math
 import os
 import subprocess
 import sys
 import tempfile
 import wave
 
-import numpy as np
-
 from . import synths
+from .mixer import Mixer, Track
 
 SAMPLE_RATE = 44100
 
@@ -42,11 +40,11 @@ def input_loop():
             print("Invalid input, try again.")
 
 
-def write_mono_wav(np_array, out_path_or_f, sample_rate):
+def write_wav(np_array, out_path_or_f, sample_rate):
+    """Writes a mono array of shape (n,) or a stereo array of shape (n, 2)."""
     audio = (np_array * (2**15 - 1)).astype("<h")
     with wave.open(out_path_or_f, "wb") as f:
-        # 2 Channels.
-        f.setnchannels(1)
+        f.setnchannels(1 if audio.ndim == 1 else audio.shape[1])
         # 2 bytes per sample.
         f.setsampwidth(2)
         f.setframerate(sample_rate)
@@ -54,7 +52,6 @@ def write_mono_wav(np_array, out_path_or_f, sample_rate):
 
 
 def play(synth_cls, wav_path):
-    synth = synth_cls(SAMPLE_RATE)
     # pitch, dur, wait
     loop = [
         (60, 1, 1),
@@ -67,17 +64,16 @@ def play(synth_cls, wav_path):
         (72, 0.125, 0.25),
     ]
     total_dur = sum(inc for _, _, inc in loop) + 1
-    t = np.linspace(0, total_dur, int(math.ceil(total_dur * SAMPLE_RATE)), False)
-    out = np.zeros_like(t)
+    notes = []
     now = 0
     for pitch, dur, increment in loop:
-        synth(t, out, pitch, now, now + dur)
+        notes.append((pitch, now, now + dur))
         now += increment
-    # to avoid overflow
-    out /= 1.1
+    mixer = Mixer(SAMPLE_RATE, [Track(synth_cls, notes)])
+    out = mixer.render(total_dur)
 
-    write_mono_wav(out, wav_path, SAMPLE_RATE)
-    print(f"Playing {type(synth).__name__} (ctrl-C to interrupt playback)")
+    write_wav(out, wav_path, SAMPLE_RATE)
+    print(f"Playing {synth_cls.__name__} (ctrl-C to interrupt playback)")
     subprocess.run(["afplay", wav_path], check=True)
 
 
@@ -60,9 +60,27 @@ class BaseSynth:
             for these durations will be memoized, which will save some
             calculation in the case of quantized data. With human performance
             or unquantized data, should probably be False.
+        audibility_threshold: level in dBFS below which output is considered
+            inaudible, or None to render every note in full. Notes whose peak
+            level (`amp * velocity / 127`) falls below the threshold are
+            skipped entirely, and the envelope tail of each note is truncated
+            once it decays below the threshold (so that any filtering is
+            only applied to the audible portion). Since the threshold is
+            compared against the nominal `amp`, synths with several summed
+            oscillators may peak somewhat higher. Default: None.
+
+    Attributes:
+        culled_notes: number of notes skipped because they were inaudible.
+        truncated_notes: number of notes whose tails were truncated.
+        saved_samples: total number of samples that were not rendered because
+            of culling or truncation.
 
     Methods:
         __call__()
+        reset_counters()
+        is_audible()
+        get_envelope()
+        synthesize()
     """
 
     min_amp = 0
@@ -77,6 +95,7 @@ class BaseSynth:
         sustain=1.0,
         release=0.005,
         memoize_envelopes=True,
+        audibility_threshold=None,
     ):
         try:
             assert sustain == 1 or decay != 0
@@ -87,6 +106,7 @@ class BaseSynth:
             self.oscillators = (Oscillator(),)
         else:
             self.oscillators = oscillators
+        self.amp = amp
         attack_i = int(sample_rate * attack)
         decay_i = int(sample_rate * decay)
         self.sustain = sustain * amp
@@ -107,6 +127,40 @@ class BaseSynth:
         if memoize_envelopes:
             self._envelopes = {}
 
+        self.audibility_threshold = audibility_threshold
+        if audibility_threshold is None:
+            self._threshold_amp = None
+        else:
+            self._threshold_amp = 10 ** (audibility_threshold / 20)
+        self.reset_counters()
+
+    def reset_counters(self):
+        """Resets the culling and truncation counters to zero."""
+        self.culled_notes = 0
+        self.truncated_notes = 0
+        self.saved_samples = 0
+
+    def is_audible(self, velocity, level=None):
+        """Returns True if a note at `velocity` is above the audibility threshold.
+
+        Args:
+            velocity: 0--127.
+
+        Keyword args:
+            level: envelope level to test, as returned by get_envelope().
+                Default: `amp`, i.e., the peak of the note.
+
+        Returns:
+            bool. If there is no audibility threshold, any non-zero level is
+            audible.
+        """
+        if level is None:
+            level = self.amp
+        level = level * velocity / 127
+        if self._threshold_amp is None:
+            return level > 0
+        return level >= self._threshold_amp
+
     def __call__(self, t, out, pitch, note_onset, note_release, velocity=64):
         """Adds a synthesized note to out.
 
@@ -129,10 +183,12 @@ class BaseSynth:
         Returns:
             None
         """
-        start_i = np.searchsorted(t, note_onset)
-        end_i = np.searchsorted(t, note_release + self.release_dur)
+        note = self._note_span(t, note_onset, note_release, velocity)
+        if note is None:
+            return
+        start_i, end_i, envelope = note
         x = t[start_i:end_i]
-        x = self._synth(x, pitch)
+        x = self.synthesize(x, pitch)
 
         try:
             filter = self._filter  # type:ignore
@@ -141,9 +197,39 @@ class BaseSynth:
         else:
             x = filter(x)
 
-        x = self._envelope(x)
+        x *= envelope
         out[start_i:end_i] += x * velocity / 127
 
+    def _note_span(self, t, note_onset, note_release, velocity):
+        """Returns the indices and envelope of the audible portion of a note.
+
+        Returns:
+            tuple (start_i, end_i, envelope), or None if the note is inaudible.
+        """
+        start_i = np.searchsorted(t, note_onset)
+        end_i = np.searchsorted(t, note_release + self.release_dur)
+        n = end_i - start_i
+        if self._threshold_amp is None:
+            return start_i, end_i, self._get_envelope(n)
+        if not self.is_audible(velocity):
+            self.culled_notes += 1
+            self.saved_samples += n
+            return None
+        envelope = self._get_envelope(n)
+        (audible,) = np.nonzero(envelope * velocity / 127 >= self._threshold_amp)
+        if not audible.size:
+            # can occur when a very short note never reaches its full amplitude
+            self.culled_notes += 1
+            self.saved_samples += n
+            return None
+        audible_n = audible[-1] + 1
+        if audible_n < n:
+            self.truncated_notes += 1
+            self.saved_samples += n - audible_n
+            end_i = start_i + audible_n
+            envelope = envelope[:audible_n]
+        return start_i, end_i, envelope
+
     def get_envelope(self, n):
         out = np.empty(n)
         if n >= self.attack_decay_i + self.release_i:
@@ -158,18 +244,22 @@ class BaseSynth:
             self._envelopes[n] = out
         return out
 
-    def _envelope(self, t):
-        if self.memoize_envelopes and len(t) in self._envelopes:
-            envelope = self._envelopes[len(t)]
-        else:
-            envelope = self.get_envelope(len(t))
-        return t * envelope
+    def _get_envelope(self, n):
+        if self.memoize_envelopes and n in self._envelopes:
+            return self._envelopes[n]
+        return self.get_envelope(n)
 
     @staticmethod
     def _waveform(t, pitch, phase=0, detune=0):
         raise NotImplementedError
 
-    def _synth(self, t, pitch):
+    def synthesize(self, t, pitch):
+        """Returns the summed oscillators (without envelope or filter) at times t.
+
+        Args:
+            t: time array.
+            pitch: midi number.
+        """
         osc = self.oscillators[0]
         out = self._waveform(
             t, pitch, phase=osc.phase, detune=osc.detune  # type:ignore
@@ -224,6 +314,10 @@ class FilteredSynth(BaseSynth):
         self.order = order
         self.b, self.a = butter_lowpass(cutoff, self.sample_rate, self.order)
 
+    def filter_coefficients(self, _pitch):
+        """Returns the (b, a) coefficients of the lowpass filter."""
+        return self.b, self.a
+
     def _filter(self, t):
         y = signal.filtfilt(self.b, self.a, t)
         return y
@@ -235,24 +329,30 @@ class FollowFilterSynth(BaseSynth):
         self.factor = factor
         self.order = order
 
-    def _filter(self, t, pitch):
+    def filter_coefficients(self, pitch):
+        """Returns the (b, a) coefficients of the lowpass filter for pitch."""
         cutoff = pitch_to_hz(pitch) * self.factor
-        b, a = butter_lowpass(cutoff, self.sample_rate, self.order)
+        return butter_lowpass(cutoff, self.sample_rate, self.order)
+
+    def _filter(self, t, pitch):
+        b, a = self.filter_coefficients(pitch)
         y = signal.filtfilt(b, a, t)
         return y
 
     def __call__(self, t, out, pitch, note_onset, note_release, velocity=64):
         # the only reason we have to override __call__ is because we need to
         # call self._filter(x, pitch) rather than self._filter(x)
-        start_i = np.searchsorted(t, note_onset)
-        end_i = np.searchsorted(t, note_release + self.release_dur)
+        note = self._note_span(t, note_onset, note_release, velocity)
+        if note is None:
+            return
+        start_i, end_i, envelope = note
         x = t[start_i:end_i]
-        x = self._synth(x, pitch)
+        x = self.synthesize(x, pitch)
         try:
             x = self._filter(x, pitch)
         except AttributeError:
             pass
-        x = self._envelope(x)
+        x *= envelope
         out[start_i:end_i] += x * velocity / 127
 
 
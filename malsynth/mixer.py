@@ -0,0 +1,236 @@
+import concurrent.futures
+import dataclasses
+import math
+import time
+
+import numpy as np
+
+
+@dataclasses.dataclass
+class Track:
+    """A single instrument in a Mixer.
+
+    Args:
+        synth_cls: a synth class, e.g., one of the values of `presets.synths`.
+        notes: array-like of shape (n_notes, 3) or (n_notes, 4). The columns
+            are pitch, onset, release, and (optionally) velocity. If velocity is
+            omitted, it defaults to 64.
+
+    Keyword args:
+        gain: linear gain applied to the track. Default 1.0.
+        pan: float in interval [-1, 1]; -1 is hard left, 1 is hard right.
+            Default 0.
+        synth_kwargs: dict of keyword args passed to `synth_cls`. Default {}.
+        name: optional name for reporting. Default: the name of `synth_cls`.
+    """
+
+    synth_cls: type
+    notes: np.ndarray
+    gain: float = 1.0
+    pan: float = 0.0
+    synth_kwargs: dict = dataclasses.field(default_factory=dict)
+    name: str | None = None
+
+    def __post_init__(self):
+        if not -1 <= self.pan <= 1:
+            raise ValueError("`pan` must be in the interval [-1, 1]")
+        self.notes = np.atleast_2d(np.asarray(self.notes, dtype=float))
+        if self.notes.size and self.notes.shape[1] not in (3, 4):
+            raise ValueError("`notes` must have 3 or 4 columns")
+        if self.name is None:
+            self.name = self.synth_cls.__name__
+
+    @property
+    def pan_gains(self):
+        """Returns (left, right) gains according to a constant-power pan law."""
+        theta = (self.pan + 1) * math.pi / 4
+        return math.cos(theta) * self.gain, math.sin(theta) * self.gain
+
+
+class PeakNormalizer:
+    """Streaming peak normalizer with one block of lookahead.
+
+    Scales blocks of audio so that their peak doesn't exceed `ceiling`. The gain
+    starts at 1 (or lower, if the first block needs it) and only ever
+    decreases. Each call takes the next block and returns the previous one:
+    when the new block needs a lower gain, the gain is ramped linearly across
+    the previous block so that it has reached the new value by the time the new
+    block begins. The gain thus never steps, and no sample needs clipping. Since
+    it only looks one block ahead, it can be used on a stream whose total length
+    isn't known in advance.
+
+    Keyword args:
+        ceiling: maximum absolute amplitude. Default 0.99.
+
+    Methods:
+        __call__()
+        flush()
+    """
+
+    def __init__(self, ceiling=0.99):
+        self.ceiling = ceiling
+        self.gain = 1.0
+        self._pending = None
+
+    def __call__(self, block):
+        """Takes the next block and returns the previous one, scaled in place.
+
+        Args:
+            block: np array of shape (n_samples,) or (n_samples, n_channels).
+                It is scaled in place when it is returned by a later call (or
+                by flush()), so it shouldn't be modified in the meantime.
+
+        Returns:
+            the previous block, or None on the first call.
+        """
+        peak = np.abs(block).max(initial=0.0)
+        target = self.gain
+        if peak * target > self.ceiling:
+            target = self.ceiling / peak
+        if self._pending is None:
+            self.gain = target
+            self._pending = block
+            return None
+        out = self._pending
+        n = len(out)
+        ramp = np.linspace(self.gain, target, n + 1)[1:]
+        out *= ramp.reshape((n,) + (1,) * (out.ndim - 1))
+        self.gain = target
+        self._pending = block
+        return out
+
+    def flush(self):
+        """Returns the last block, scaled in place, or None if there is none."""
+        out = self._pending
+        if out is not None:
+            out *= self.gain
+        self._pending = None
+        return out
+
+
+class Mixer:
+    """Renders several tracks concurrently and sums them to a stereo bus.
+
+    Each track is rendered by its own synth instance into its own mono buffer
+    in a thread pool (the bulk of the work happens inside numpy and scipy, which
+    release the GIL). The buffers are then panned and summed to a stereo bus,
+    which is passed through a PeakNormalizer block by block.
+
+    Args:
+        sample_rate: int.
+        tracks: iterable of Track.
+
+    Keyword args:
+        max_workers: passed to `concurrent.futures.ThreadPoolExecutor`.
+            Default None.
+        ceiling: ceiling of the peak normalizer. Default 0.99.
+        block_size: number of samples per block for summing and normalizing.
+            Default 4096.
+
+    Attributes:
+        track_buffers: list of the mono buffers from the most recent call to
+            render(), in the same order as `tracks`.
+        render_times: list of the CPU time (`time.thread_time()`) in seconds
+            spent rendering each track in the most recent call to render(), in
+            the same order as `tracks`. Unlike wall time, this doesn't include
+            time spent waiting while other tracks were rendering, so it
+            reflects how expensive each track is.
+        render_wall_times: list of the wall time in seconds from the start to
+            the end of rendering each track, in the same order as `tracks`.
+        synths: list of the synth instances used in the most recent call to
+            render(), e.g., for inspecting their counters.
+
+    Methods:
+        add_track()
+        render()
+    """
+
+    def __init__(
+        self, sample_rate, tracks=(), max_workers=None, ceiling=0.99, block_size=4096
+    ):
+        self.sample_rate = sample_rate
+        self.tracks = list(tracks)
+        self.max_workers = max_workers
+        self.ceiling = ceiling
+        self.block_size = block_size
+        self.track_buffers = []
+        self.render_times = []
+        self.render_wall_times = []
+        self.synths = []
+
+    def add_track(self, *args, **kwargs):
+        """Adds a track. Arguments are passed to Track."""
+        track = Track(*args, **kwargs)
+        self.tracks.append(track)
+        return track
+
+    def render(self, total_dur=None):
+        """Renders all tracks and returns the stereo bus.
+
+        Keyword args:
+            total_dur: duration in seconds. Default: the latest note release
+                plus the longest synth release.
+
+        Returns:
+            np array of shape (n_samples, 2).
+        """
+        self.synths = [
+            track.synth_cls(self.sample_rate, **track.synth_kwargs)
+            for track in self.tracks
+        ]
+        if total_dur is None:
+            total_dur = max(
+                (
+                    track.notes[:, 2].max() + synth.release_dur
+                    for track, synth in zip(self.tracks, self.synths)
+                    if track.notes.size
+                ),
+                default=0,
+            )
+        t = np.linspace(
+            0,
+            total_dur,
+            int(math.ceil(total_dur * self.sample_rate)),
+            False,
+        )
+
+        with concurrent.futures.ThreadPoolExecutor(self.max_workers) as executor:
+            results = list(
+                executor.map(
+                    lambda args: self._render_track(t, *args),
+                    zip(self.tracks, self.synths),
+                )
+            )
+        self.track_buffers = [buffer for buffer, _, _ in results]
+        self.render_times = [cpu_time for _, cpu_time, _ in results]
+        self.render_wall_times = [wall_time for _, _, wall_time in results]
+        return self._sum_to_bus(len(t))
+
+    @staticmethod
+    def _render_track(t, track, synth):
+        start_cpu = time.thread_time()
+        start_wall = time.perf_counter()
+        out = np.zeros_like(t)
+        for note in track.notes if track.notes.size else ():
+            pitch, onset, release = note[:3]
+            velocity = note[3] if len(note) > 3 else 64
+            synth(t, out, pitch, onset, release, velocity=velocity)
+        return (
+            out,
+            time.thread_time() - start_cpu,
+            time.perf_counter() - start_wall,
+        )
+
+    def _sum_to_bus(self, n):
+        bus = np.zeros((n, 2))
+        pan_gains = [track.pan_gains for track in self.tracks]
+        normalizer = PeakNormalizer(self.ceiling)
+        for start_i in range(0, n, self.block_size):
+            end_i = min(start_i + self.block_size, n)
+            block = bus[start_i:end_i]
+            for buffer, (left, right) in zip(self.track_buffers, pan_gains):
+                block[:, 0] += buffer[start_i:end_i] * left
+                block[:, 1] += buffer[start_i:end_i] * right
+            normalizer(block)
+        normalizer.flush()
+        return bus
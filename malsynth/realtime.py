@@ -0,0 +1,390 @@
+import asyncio
+import dataclasses
+import time
+import wave
+
+import numpy as np
+from scipy import signal
+
+
+@dataclasses.dataclass
+class NoteOn:
+    pitch: float | int
+    velocity: int = 64
+
+
+@dataclasses.dataclass
+class NoteOff:
+    pitch: float | int
+
+
+class Voice:
+    """A single voice of a RealtimeEngine.
+
+    Renders one note incrementally, block by block, using the oscillators and
+    envelope parameters of a BaseSynth. Since the synths' zero-phase filters
+    (`filtfilt`) need the whole note, filtered synths are approximated by
+    running the same filter forward twice with persistent state, which gives
+    the same magnitude response.
+    """
+
+    def __init__(self, synth, block_size, release_ramp):
+        self.synth = synth
+        self.release_ramp = release_ramp
+        self._ramp = release_ramp
+        self._arange = np.arange(block_size)
+        self._t = np.empty(block_size)
+        self._envelope = np.empty(block_size)
+        self.active = False
+        self.pitch = None
+        self.velocity = 0
+        self.gain = 0.0
+        self.note_i = 0
+        self.pos = 0
+        self.released_at = None
+        self.release_level = 0.0
+        self.release_pending = False
+        self.filter = None
+
+    def start(self, pitch, velocity, note_i):
+        """Starts a note. `note_i` orders notes by arrival, for voice stealing."""
+        self.active = True
+        self.pitch = pitch
+        self.velocity = velocity
+        self.gain = velocity / 127
+        self.note_i = note_i
+        self.pos = 0
+        self.released_at = None
+        self.release_level = 0.0
+        self.release_pending = False
+        self._ramp = self.release_ramp
+        try:
+            b, a = self.synth.filter_coefficients(pitch)
+        except AttributeError:
+            self.filter = None
+        else:
+            zi = np.zeros(max(len(a), len(b)) - 1)
+            self.filter = (b, a, [zi, zi.copy()])
+
+    def level(self):
+        """Returns the envelope level of the next sample to be rendered."""
+        synth = self.synth
+        if self.released_at is None:
+            if self.pos < synth.attack_decay_i:
+                return synth.attack_envelope[self.pos]
+            return synth.sustain
+        release_p = self.pos - self.released_at
+        if release_p < len(self._ramp):
+            return self.release_level * self._ramp[release_p]
+        return 0.0
+
+    def release(self, ramp=None):
+        """Starts the release from the current envelope level.
+
+        A voice that hasn't rendered any samples yet is released after its first
+        block, so that notes shorter than a block are still heard.
+
+        Keyword args:
+            ramp: release ramp (from 1 to 0) to use instead of the synth's
+                release, e.g., a short fade for a voice that is being stolen.
+                Unlike the synth's release, this also applies to voices that are
+                already releasing. Default: None.
+        """
+        if ramp is None:
+            if self.released_at is not None:
+                return
+            if not self.pos:
+                self.release_pending = True
+                return
+            ramp = self.release_ramp
+        self.release_level = self.level()
+        self.released_at = self.pos
+        self.release_pending = False
+        self._ramp = ramp
+
+    def render(self, out):
+        """Adds the next len(out) samples of the voice to out."""
+        synth = self.synth
+        n = len(out)
+        p = self._arange[:n] + self.pos
+        t = self._t[:n]
+        np.divide(p, synth.sample_rate, out=t)
+        envelope = self._envelope[:n]
+        if self.released_at is None:
+            envelope.fill(synth.sustain)
+            mask = p < synth.attack_decay_i
+            envelope[mask] = synth.attack_envelope[p[mask]]
+        else:
+            release_p = p - self.released_at
+            mask = release_p < len(self._ramp)
+            envelope.fill(0.0)
+            envelope[mask] = self.release_level * self._ramp[release_p[mask]]
+            if release_p[-1] >= len(self._ramp) - 1:
+                self.active = False
+
+        x = synth.synthesize(t, self.pitch)
+        if self.filter is not None:
+            b, a, zis = self.filter
+            for i, zi in enumerate(zis):
+                x, zis[i] = signal.lfilter(b, a, x, zi=zi)
+        x *= envelope
+        x *= self.gain
+        out += x
+
+        self.pos += n
+        if self.release_pending:
+            self.release()
+        elif self.released_at is None and self.pos >= synth.attack_decay_i:
+            # once the decay is over, a voice whose sustain is inaudible can be
+            #   freed without waiting for its note-off
+            if not synth.is_audible(self.velocity, synth.sustain):
+                self.active = False
+
+
+class BlockStats:
+    """Per-block compute times measured against the block deadline.
+
+    Args:
+        deadline: duration of one block in seconds.
+    """
+
+    def __init__(self, deadline):
+        self.deadline = deadline
+        self.times = []
+
+    def record(self, compute_time):
+        self.times.append(compute_time)
+
+    @property
+    def n_blocks(self):
+        return len(self.times)
+
+    @property
+    def overruns(self):
+        """Number of blocks whose compute time exceeded the deadline."""
+        return sum(compute_time > self.deadline for compute_time in self.times)
+
+    @property
+    def load(self):
+        """Mean compute time as a proportion of the deadline."""
+        if not self.times:
+            return 0.0
+        return np.mean(self.times) / self.deadline
+
+    def percentile(self, q):
+        return np.percentile(self.times, q) if self.times else 0.0
+
+    def summary(self):
+        return {
+            "n_blocks": self.n_blocks,
+            "deadline": self.deadline,
+            "mean": np.mean(self.times) if self.times else 0.0,
+            "p99": self.percentile(99),
+            "max": max(self.times, default=0.0),
+            "load": self.load,
+            "overruns": self.overruns,
+        }
+
+
+class RealtimeEngine:
+    """Renders a synth in fixed-size blocks in response to note events.
+
+    Events (NoteOn and NoteOff) are read from an asyncio queue at the start of
+    each block, so their timing is quantized to the block size. Notes are
+    assigned to a preallocated pool of voices; when every voice is busy, the
+    voice that has been releasing the longest is stolen, or, if none are
+    releasing, the oldest voice. So that stealing doesn't click, the stolen
+    note keeps sounding while it fades out over `steal_fade` seconds, and the
+    new note takes one of an equal number of preallocated spare voices. A
+    NoteOn with velocity 0 is treated as a NoteOff. If the synth has an
+    `audibility_threshold`, notes below it are ignored (and counted in the
+    synth's `culled_notes`).
+
+    Args:
+        synth: a BaseSynth instance.
+
+    Keyword args:
+        block_size: number of samples per block. Default 256.
+        n_voices: size of the voice pool. Default 16.
+        steal_fade: duration in seconds of the fade-out of stolen voices.
+            Default 0.005.
+
+    Attributes:
+        events: the asyncio.Queue from which events are read.
+        stats: BlockStats for all blocks processed so far.
+        steals: number of voices that have been stolen.
+
+    Methods:
+        note_on()
+        note_off()
+        process_block()
+        run()
+    """
+
+    def __init__(self, synth, block_size=256, n_voices=16, steal_fade=0.005):
+        self.synth = synth
+        self.sample_rate = synth.sample_rate
+        self.block_size = block_size
+        self.events = asyncio.Queue()
+        release_ramp = np.linspace(1, 0, synth.release_i)
+        self.voices = [Voice(synth, block_size, release_ramp) for _ in range(n_voices)]
+        self._spares = [Voice(synth, block_size, release_ramp) for _ in range(n_voices)]
+        self._fading = []
+        self._steal_ramp = np.linspace(1, 0, int(self.sample_rate * steal_fade))
+        self._block = np.zeros(block_size)
+        self._note_i = 0
+        self.stats = BlockStats(block_size / self.sample_rate)
+        self.steals = 0
+
+    def note_on(self, pitch, velocity=64):
+        self.events.put_nowait(NoteOn(pitch, velocity))
+
+    def note_off(self, pitch):
+        self.events.put_nowait(NoteOff(pitch))
+
+    def _handle_note_on(self, event):
+        synth = self.synth
+        if event.velocity == 0:
+            self._handle_note_off(NoteOff(event.pitch))
+            return
+        if not synth.is_audible(event.velocity):
+            synth.culled_notes += 1
+            return
+        voice = next((voice for voice in self.voices if not voice.active), None)
+        if voice is None:
+            voice = self._steal()
+        voice.start(event.pitch, event.velocity, self._note_i)
+        self._note_i += 1
+
+    def _steal(self):
+        self.steals += 1
+        releasing = [voice for voice in self.voices if voice.released_at is not None]
+        if releasing:
+            # the voice that has been releasing the longest
+            stolen = min(releasing, key=lambda voice: voice.released_at - voice.pos)
+        else:
+            stolen = min(self.voices, key=lambda voice: voice.note_i)
+        stolen.release(self._steal_ramp)
+        if self._spares:
+            replacement = self._spares.pop()
+        else:
+            # more steals than spares within one fade: cut the oldest fade short
+            replacement = self._fading.pop(0)
+        self._fading.append(stolen)
+        self.voices[self.voices.index(stolen)] = replacement
+        return replacement
+
+    def _handle_note_off(self, event):
+        held = [
+            voice
+            for voice in self.voices
+            if voice.active
+            and voice.released_at is None
+            and not voice.release_pending
+            and voice.pitch == event.pitch
+        ]
+        if held:
+            min(held, key=lambda voice: voice.note_i).release()
+
+    def process_block(self):
+        """Handles pending events and renders the next block.
+
+        Returns:
+            np array of length `block_size`. The array is reused for the next
+            block, so callers that want to keep it must copy it.
+        """
+        start = time.perf_counter()
+        while True:
+            try:
+                event = self.events.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            if isinstance(event, NoteOn):
+                self._handle_note_on(event)
+            else:
+                self._handle_note_off(event)
+        block = self._block
+        block.fill(0.0)
+        for voice in self.voices:
+            if voice.active:
+                voice.render(block)
+        for voice in self._fading:
+            voice.render(block)
+        self._spares.extend(voice for voice in self._fading if not voice.active)
+        self._fading = [voice for voice in self._fading if voice.active]
+        self.stats.record(time.perf_counter() - start)
+        return block
+
+    async def run(self, sink, n_blocks=None, realtime=True):
+        """Renders blocks and passes each to `sink`.
+
+        Args:
+            sink: callable that takes a block, e.g., a WavSink or RawSink.
+
+        Keyword args:
+            n_blocks: number of blocks to render. Default: run until cancelled.
+            realtime: if True, wait until each block's deadline before rendering
+                the next, as an audio callback would. If False, render as fast
+                as possible (yielding to other tasks between blocks). Default
+                True.
+        """
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        block_i = 0
+        while n_blocks is None or block_i < n_blocks:
+            sink(self.process_block())
+            block_i += 1
+            if realtime:
+                await asyncio.sleep(
+                    max(0.0, start + block_i * self.stats.deadline - loop.time())
+                )
+            else:
+                await asyncio.sleep(0)
+
+
+class RawSink:
+    """Writes blocks as raw signed 16-bit little-endian mono samples.
+
+    Args:
+        f: a binary file object, e.g., `sys.stdout.buffer` to pipe to a player
+            like `aplay -f S16_LE -r 44100`.
+    """
+
+    def __init__(self, f):
+        self.f = f
+
+    def __call__(self, block):
+        self.f.write((np.clip(block, -1, 1) * (2**15 - 1)).astype("<h").tobytes())
+
+
+class WavSink:
+    """Writes blocks to a mono wav file.
+
+    Args:
+        out_path_or_f: path or binary file object.
+        sample_rate: int.
+
+    Methods:
+        close()
+    """
+
+    def __init__(self, out_path_or_f, sample_rate):
+        self.f = wave.open(out_path_or_f, "wb")
+        self.f.setnchannels(1)
+        # 2 bytes per sample.
+        self.f.setsampwidth(2)
+        self.f.setframerate(sample_rate)
+
+    def __call__(self, block):
+        self.f.writeframes(
+            (np.clip(block, -1, 1) * (2**15 - 1)).astype("<h").tobytes()
+        )
+
+    def close(self):
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
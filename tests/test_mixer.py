@@ -0,0 +1,104 @@
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+)
+
+import numpy as np
+
+import malsynth
+
+SAMPLE_RATE = 44100
+
+NOTES = [(60, 0, 0.5, 127), (64, 0.25, 0.75, 127), (67, 0.5, 1.0, 127)]
+
+
+def test_mixer():
+    mixer = malsynth.Mixer(SAMPLE_RATE, block_size=1000)
+    mixer.add_track(malsynth.Sine, NOTES, pan=-1)
+    mixer.add_track(malsynth.presets.synths[1], [note[:3] for note in NOTES], pan=1)
+    mixer.add_track(malsynth.TripleSine, NOTES, gain=0.5)
+    bus = mixer.render()
+    total_dur = 1.0 + mixer.synths[0].release_dur
+    n = int(np.ceil(total_dur * SAMPLE_RATE))
+    assert bus.shape == (n, 2)
+    assert np.abs(bus).max() <= mixer.ceiling
+    assert len(mixer.render_times) == len(mixer.track_buffers) == 3
+    assert all(render_time > 0 for render_time in mixer.render_times)
+
+    # per-track buffers should match rendering each track by hand
+    t = np.linspace(0, total_dur, n, False)
+    out = np.zeros_like(t)
+    synth = malsynth.Sine(SAMPLE_RATE)
+    for pitch, onset, release, velocity in NOTES:
+        synth(t, out, pitch, onset, release, velocity=velocity)
+    assert np.allclose(mixer.track_buffers[0], out)
+
+
+def test_pan():
+    track = malsynth.Track(malsynth.Sine, NOTES, pan=-1)
+    left, right = track.pan_gains
+    assert left == 1 and abs(right) < 1e-12
+    left, right = malsynth.Track(malsynth.Sine, NOTES).pan_gains
+    assert np.isclose(left**2 + right**2, 1)
+    try:
+        malsynth.Track(malsynth.Sine, NOTES, pan=2)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected ValueError")
+
+
+def test_peak_normalizer():
+    normalizer = malsynth.PeakNormalizer(ceiling=0.5)
+    # the normalizer is one block behind
+    assert normalizer(np.full(4, 0.25)) is None
+    # the gain ramps down across the block before the loud one
+    assert np.allclose(
+        normalizer(np.array([1.0, -2.0])), 0.25 * np.array([0.8125, 0.625, 0.4375, 0.25])
+    )
+    assert np.array_equal(normalizer(np.full(4, 0.25)), np.array([0.25, -0.5]))
+    # gain never increases again
+    assert np.array_equal(normalizer.flush(), np.full(4, 0.0625))
+    assert normalizer.flush() is None
+
+
+def test_peak_normalizer_ramp():
+    normalizer = malsynth.PeakNormalizer(ceiling=1.0)
+    blocks = [np.full(1000, 0.9), np.linspace(0.9, 2.0, 1000), np.full(1000, 2.0)]
+    out = [normalizer(block.copy()) for block in blocks]
+    out = np.concatenate(out[1:] + [normalizer.flush()])
+    assert out.max() <= 1.0
+    # the gain is ramped across the block rather than stepping at its start
+    assert np.abs(np.diff(out)).max() < 0.01
+    assert normalizer.gain == 0.5
+
+
+def test_mixer_gain_drop():
+    mixer = malsynth.Mixer(SAMPLE_RATE)
+    mixer.add_track(malsynth.Sine, [(60, 0, 2, 127), (64, 1, 2, 127), (67, 1, 2, 127)])
+    bus = mixer.render()
+    assert np.abs(bus).max() <= mixer.ceiling + 1e-12
+    unnormalized = np.stack(mixer.track_buffers).sum(axis=0)
+    # no jumps beyond what the unnormalized signal itself contains
+    max_jump = np.abs(np.diff(unnormalized)).max() * max(mixer.tracks[0].pan_gains)
+    assert np.abs(np.diff(bus, axis=0)).max() <= max_jump * 1.01
+    # no sample is clipped: the bus is the unnormalized signal times a gain that
+    #   never increases (clipping would lower the gain of single samples)
+    left, _ = mixer.tracks[0].pan_gains
+    assert np.abs(unnormalized).max() * left > mixer.ceiling
+    audible = np.abs(unnormalized) > 1e-6
+    gain = bus[audible, 0] / (unnormalized[audible] * left)
+    assert np.all(np.diff(gain) <= 1e-9)
+
+
+def test_render_times():
+    mixer = malsynth.Mixer(SAMPLE_RATE)
+    for synth_cls in (malsynth.Sine, malsynth.FollowSaw, malsynth.TripleSine):
+        mixer.add_track(synth_cls, NOTES)
+    mixer.render()
+    assert len(mixer.render_times) == len(mixer.render_wall_times) == 3
+    for cpu_time, wall_time in zip(mixer.render_times, mixer.render_wall_times):
+        assert 0 < cpu_time
+        assert 0 < wall_time
@@ -0,0 +1,140 @@
+import asyncio
+import io
+import os
+import sys
+import wave
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+)
+
+import numpy as np
+
+import malsynth
+
+SAMPLE_RATE = 44100
+BLOCK_SIZE = 64
+
+
+def test_matches_offline():
+    synth = malsynth.Sine(SAMPLE_RATE, decay=0.01, sustain=0.5)
+    engine = malsynth.RealtimeEngine(synth, block_size=BLOCK_SIZE)
+    n_held_blocks = 20
+    n_blocks = n_held_blocks + synth.release_i // BLOCK_SIZE + 2
+    engine.note_on(60, velocity=100)
+    blocks = []
+    for block_i in range(n_blocks):
+        if block_i == n_held_blocks:
+            engine.note_off(60)
+        blocks.append(engine.process_block().copy())
+    realtime = np.concatenate(blocks)
+    assert not any(voice.active for voice in engine.voices)
+
+    n = n_blocks * BLOCK_SIZE
+    t = np.arange(n) / SAMPLE_RATE
+    offline = np.zeros(n)
+    release_i = n_held_blocks * BLOCK_SIZE
+    synth(t, offline, 60, 0, t[release_i], velocity=100)
+    assert np.allclose(realtime[:release_i], offline[:release_i])
+    assert np.abs(realtime - offline).max() < 1e-2
+    assert engine.stats.n_blocks == n_blocks
+
+
+def test_filtered():
+    synth = malsynth.presets.ShortFollowSaw(SAMPLE_RATE)
+    engine = malsynth.RealtimeEngine(synth, block_size=BLOCK_SIZE)
+    engine.note_on(60)
+    out = np.concatenate([engine.process_block().copy() for _ in range(100)])
+    assert np.abs(out).max() > 0
+    # sustain is 0, so the voice is freed once the decay is over
+    assert not engine.voices[0].active
+
+
+def test_voice_stealing():
+    engine = malsynth.RealtimeEngine(
+        malsynth.Sine(SAMPLE_RATE), block_size=BLOCK_SIZE, n_voices=2
+    )
+    engine.note_on(60)
+    engine.process_block()
+    engine.note_on(64)
+    engine.process_block()
+    engine.note_on(67)
+    engine.process_block()
+    assert engine.steals == 1
+    assert sorted(voice.pitch for voice in engine.voices) == [64, 67]
+
+    # voices that are releasing are stolen before held voices
+    engine.note_off(67)
+    engine.note_on(72)
+    engine.process_block()
+    assert engine.steals == 2
+    assert sorted(voice.pitch for voice in engine.voices) == [64, 72]
+
+    # velocity 0 is a note-off
+    engine.note_on(64, velocity=0)
+    engine.process_block()
+    assert [voice.released_at is not None for voice in engine.voices].count(True) == 1
+
+
+def test_run():
+    engine = malsynth.RealtimeEngine(malsynth.Saw(SAMPLE_RATE), block_size=BLOCK_SIZE)
+    f = io.BytesIO()
+
+    async def play():
+        await engine.events.put(malsynth.NoteOn(60, 127))
+        with malsynth.WavSink(f, SAMPLE_RATE) as sink:
+            await engine.run(sink, n_blocks=50, realtime=False)
+
+    asyncio.run(play())
+    f.seek(0)
+    with wave.open(f, "rb") as wav:
+        assert wav.getnframes() == 50 * BLOCK_SIZE
+    summary = engine.stats.summary()
+    assert summary["n_blocks"] == 50
+    assert summary["deadline"] == BLOCK_SIZE / SAMPLE_RATE
+    assert 0 <= summary["overruns"] <= 50
+    assert summary["max"] >= summary["mean"] > 0
+
+    raw = io.BytesIO()
+    malsynth.RawSink(raw)(engine.process_block())
+    assert len(raw.getvalue()) == 2 * BLOCK_SIZE
+
+
+def test_note_shorter_than_block():
+    engine = malsynth.RealtimeEngine(malsynth.Sine(SAMPLE_RATE), block_size=256)
+    engine.note_on(60)
+    engine.note_off(60)
+    out = np.concatenate([engine.process_block().copy() for _ in range(5)])
+    assert np.abs(out).max() > 0.1
+    assert not any(voice.active for voice in engine.voices)
+
+
+def test_steal_fade():
+    engine = malsynth.RealtimeEngine(
+        malsynth.Sine(SAMPLE_RATE), block_size=BLOCK_SIZE, n_voices=1
+    )
+    engine.note_on(60, velocity=127)
+    blocks = [engine.process_block().copy() for _ in range(20)]
+    engine.note_on(67, velocity=127)
+    blocks.extend(engine.process_block().copy() for _ in range(20))
+    out = np.concatenate(blocks)
+    assert engine.steals == 1
+    # at most the slope of the two sines plus the fade and the attack
+    slopes = [2 * np.pi * 440 * 2 ** ((p - 69) / 12) / SAMPLE_RATE for p in (60, 67)]
+    fade_step = 1 / int(SAMPLE_RATE * 0.005)
+    attack_step = 1 / engine.synth.attack_decay_i
+    steal_i = 20 * BLOCK_SIZE
+    jumps = np.abs(np.diff(out[steal_i - 1 : steal_i + 4 * BLOCK_SIZE]))
+    assert jumps.max() <= sum(slopes) + fade_step + attack_step
+
+
+def test_steal_order_within_block():
+    engine = malsynth.RealtimeEngine(
+        malsynth.Sine(SAMPLE_RATE), block_size=BLOCK_SIZE, n_voices=2
+    )
+    # a chord larger than the pool arriving in a single block
+    for pitch in range(60, 70):
+        engine.note_on(pitch)
+    engine.process_block()
+    assert engine.steals == 8
+    assert sorted(voice.pitch for voice in engine.voices) == [68, 69]
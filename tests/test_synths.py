@@ -3,6 +3,8 @@ import sys
 import traceback
 import wave
 
+import numpy as np
+
 sys.path.insert(
     0, os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 )
@@ -60,6 +62,46 @@ def test_envelope():
         breakpoint()
 
 
+def test_audibility_threshold():
+    t = np.linspace(0, 2, 2 * SAMPLE_RATE, False)
+    # no threshold: every note is rendered in full
+    synth = malsynth.ShortSine(SAMPLE_RATE)
+    reference = np.zeros_like(t)
+    synth(t, reference, 60, 0, 1, velocity=1)
+    synth(t, reference, 60, 1, 1.5)
+    assert synth.culled_notes == synth.truncated_notes == synth.saved_samples == 0
+
+    synth = malsynth.ShortSine(SAMPLE_RATE, audibility_threshold=-40)
+    out = np.zeros_like(t)
+    # amp * 1 / 127 is about -42 dBFS, so this note should be culled
+    synth(t, out, 60, 0, 1, velocity=1)
+    culled_n = np.searchsorted(t, 1 + synth.release_dur)
+    assert synth.culled_notes == 1
+    assert synth.saved_samples == culled_n
+    assert not out.any()
+
+    # sustain is 0 so the tail should be truncated once the decay is inaudible
+    synth(t, out, 60, 1, 1.5)
+    assert synth.culled_notes == 1
+    assert synth.truncated_notes == 1
+    assert synth.saved_samples > culled_n
+    assert np.flatnonzero(out)[-1] < np.searchsorted(t, 1.5)
+    assert np.abs(out - reference).max() < 10 ** (-40 / 20)
+
+    synth.reset_counters()
+    assert synth.culled_notes == synth.truncated_notes == synth.saved_samples == 0
+
+
+def test_audibility_threshold_filtered():
+    t = np.linspace(0, 1, SAMPLE_RATE, False)
+    synth = malsynth.presets.ShortFollowSaw(SAMPLE_RATE, audibility_threshold=-30)
+    out = np.zeros_like(t)
+    synth(t, out, 60, 0, 0.75)
+    assert synth.truncated_notes == 1
+    assert synth.saved_samples > 0
+    assert np.flatnonzero(out)[-1] < np.searchsorted(t, 0.75)
+
+
 def write_mono_wav(np_array, out_path_or_f, sample_rate):
     audio = (np_array * (2 ** 15 - 1)).astype("<h")
     with wave.open(out_path_or_f, "wb") as f: